@@ -0,0 +1,75 @@
+"""On-disk cache for model responses"""
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+
+class ResponseCache:
+    """File-backed cache for (model, prompt) -> response lookups
+
+    Each entry is a small JSON file under ~/.ai-cli/cache named by a
+    blake2b hash of the model and prompt, so a repeated prompt skips the
+    network round-trip entirely. Entries expire after a TTL (seconds,
+    AI_CLI_CACHE_TTL environment variable, default one hour). A small
+    in-memory layer in front of the files makes repeats within one
+    process (chat loops, compare runs) free of even the disk read.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, ttl: Optional[float] = None):
+        self.cache_dir = cache_dir or Path.home() / ".ai-cli" / "cache"
+        if ttl is None:
+            ttl = float(os.environ.get("AI_CLI_CACHE_TTL", 3600))
+        self.ttl = ttl
+        self._memory = {}
+
+    def _entry_path(self, model: str, prompt: str) -> Path:
+        digest = hashlib.blake2b(f"{model}|{prompt}".encode(), digest_size=16).hexdigest()
+        return self.cache_dir / f"{digest}.json"
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        """Return the cached response, or None on miss or expiry"""
+        path = self._entry_path(model, prompt)
+
+        hit = self._memory.get(path)
+        if hit is not None:
+            stored, response = hit
+            if time.time() - stored <= self.ttl:
+                return response
+            del self._memory[path]
+
+        try:
+            mtime = path.stat().st_mtime
+            if time.time() - mtime > self.ttl:
+                return None
+            response = json.loads(path.read_bytes())["response"]
+        except (OSError, json.JSONDecodeError, KeyError):
+            return None
+
+        self._memory[path] = (mtime, response)
+        return response
+
+    def set(self, model: str, prompt: str, response: str) -> None:
+        """Store a response; cache failures are never fatal"""
+        path = self._entry_path(model, prompt)
+        self._memory[path] = (time.time(), response)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            entry = {"model": model, "response": response}
+            path.write_text(json.dumps(entry))
+        except OSError:
+            pass
+
+    def clear(self) -> int:
+        """Delete all cached entries, returning how many were removed"""
+        self._memory.clear()
+        removed = 0
+        try:
+            for entry in self.cache_dir.glob("*.json"):
+                entry.unlink()
+                removed += 1
+        except OSError:
+            pass
+        return removed
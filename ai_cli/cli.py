@@ -1,15 +1,21 @@
 """Main CLI module for the AI model manager"""
 import typer
 import os
+import select
+import shutil
 import sys
 import tty
 import termios
-from dotenv import load_dotenv
-from typing import Optional, List, Tuple
-from .models import AIModelManager
-from .config import ConfigManager
+from typing import TYPE_CHECKING, Optional, List, Tuple
 
-load_dotenv()
+from .config import PROVIDERS
+
+if TYPE_CHECKING:
+    from .models import AIModelManager
+
+# AIModelManager (which pulls in the provider SDKs), ConfigManager, and
+# dotenv are imported inside the commands that need them so that --help
+# and config-only invocations don't pay their import cost
 
 app = typer.Typer(
     name="ai-cli",
@@ -19,50 +25,114 @@ app = typer.Typer(
 )
 
 
+# Providers that accept an API key via config --set - single source of
+# truth lives in config.py
+_SUPPORTED_PROVIDERS = frozenset(PROVIDERS)
+
+# ANSI sequences for the raw-mode selector, prebuilt as bytes so the
+# render path can write straight to the tty without re-encoding the
+# fixed parts of every frame
+_CLEAR = b"\033[2J\033[H"
+_HIDE_CURSOR = b"\033[?25l"
+_SHOW_CURSOR = b"\033[?25h"
+_ERASE_LINE = b"\033[2K"
+_RESET = b"\033[0m"
+_SELECTED_PRE = b"  \033[1;36m>\033[0m \033[1m"
+_UNSELECTED_PRE = b"    \033[2m"
+
+# Section headers for compare, precomputed for the fixed providers so the
+# result loop skips the per-model upper() and f-string formatting
+# (ollama:* names are dynamic and fall back to formatting on demand)
+_COMPARE_HEADERS = {m: f"\n--- {m.upper()} ---\n" for m in PROVIDERS}
+
+
+def _get_manager() -> "AIModelManager":
+    """Return the shared AIModelManager for the current configuration
+
+    The cache lives in models.get_model_manager, keyed by the configured
+    provider keys - so a key set mid-process (config --set then chat)
+    yields a fresh manager, where a plain lru_cache here would keep
+    serving the stale one.
+    """
+    from .models import get_model_manager
+
+    return get_model_manager()
+
+
 def select_option(options: List[Tuple[str, str]], title: str = "Select an option:") -> Optional[Tuple[str, str]]:
     """Interactive selection with arrow keys and vim motions (j/k)"""
     if not options:
         return None
     
     current = 0
-    
+
     def clear_screen():
         """Clear screen properly"""
-        sys.stdout.write("\033[2J\033[H")
-        sys.stdout.flush()
-    
+        os.write(out_fd, _CLEAR)
+
     def hide_cursor():
         """Hide terminal cursor"""
-        sys.stdout.write("\033[?25l")
-        sys.stdout.flush()
-    
+        os.write(out_fd, _HIDE_CURSOR)
+
     def show_cursor():
         """Show terminal cursor"""
-        sys.stdout.write("\033[?25h")
-        sys.stdout.flush()
-    
+        os.write(out_fd, _SHOW_CURSOR)
+
     def render():
-        """Render the selection menu"""
-        clear_screen()
-        sys.stdout.write(f"\r\n{title}\r\n")
-        sys.stdout.write("  ↑/↓ or j/k to navigate • Enter to select • q/ESC to quit\r\n\r\n")
-        
+        """Render the selection menu as one unbuffered write
+
+        Building the whole frame first means a redraw is a single write
+        to the tty instead of one per line, which avoids flicker and
+        keeps slow terminals responsive. The frame stays in bytes
+        throughout - only the dynamic labels get encoded.
+        """
+        buf = bytearray(_CLEAR)
+        buf += f"\r\n{title}\r\n  ↑/↓ or j/k to navigate • Enter to select • q/ESC to quit\r\n\r\n".encode()
         for idx, (display, _) in enumerate(options):
             if idx == current:
                 # Selected item with colored indicator and bold text
-                sys.stdout.write(f"  \033[1;36m>\033[0m \033[1m{display}\033[0m\r\n")
+                buf += _SELECTED_PRE + display.encode() + _RESET + b"\r\n"
             else:
                 # Unselected item with dimmed text
-                sys.stdout.write(f"    \033[2m{display}\033[0m\r\n")
-        sys.stdout.flush()
-    
-    # Check if stdin is a terminal
-    if not sys.stdin.isatty():
+                buf += _UNSELECTED_PRE + display.encode() + _RESET + b"\r\n"
+        os.write(out_fd, buf)
+
+    # First option row on screen: blank line, title, help line, blank
+    # line come first (render() starts writing at row 1)
+    options_start_row = 5
+
+    def move_selection(prev, new):
+        """Redraw only the two rows whose selection state changed
+
+        A full repaint on every keypress writes O(N) lines; repositioning
+        the cursor and rewriting the old and new selection keeps per-key
+        output constant no matter how long the menu is.
+        """
+        # Absolute row addressing only holds while the whole menu fits
+        # on screen; once render() has scrolled, row N is no longer
+        # option N. Fall back to the full repaint in that case
+        if options_start_row + len(options) - 1 > shutil.get_terminal_size().lines:
+            render()
+            return
+        buf = bytearray()
+        buf += f"\033[{options_start_row + prev};1H".encode() + _ERASE_LINE
+        buf += _UNSELECTED_PRE + options[prev][0].encode() + _RESET
+        buf += f"\033[{options_start_row + new};1H".encode() + _ERASE_LINE
+        buf += _SELECTED_PRE + options[new][0].encode() + _RESET
+        os.write(out_fd, buf)
+
+    # Check if stdin is a terminal - os.isatty(0) is the raw isatty(2)
+    # syscall, skipping the io.TextIOWrapper attribute walk, and the fd
+    # local is reused for every read below
+    fd = 0
+    if not os.isatty(fd):
         typer.echo("Error: Interactive mode requires a terminal")
         return None
-    
+
+    # Only resolved once we know we're on a real terminal
+    out_fd = sys.stdout.fileno()
+
     # Save terminal settings
-    fd = sys.stdin.fileno()
     old_settings = termios.tcgetattr(fd)
     
     try:
@@ -71,39 +141,50 @@ def select_option(options: List[Tuple[str, str]], title: str = "Select an option
         render()
         
         while True:
-            ch = sys.stdin.read(1)
-            
+            # One read picks up a whole escape sequence at once instead
+            # of three 1-byte reads per arrow key
+            data = os.read(fd, 8)
+
             # Handle escape sequences (arrow keys)
-            if ch == '\x1b':
-                next1 = sys.stdin.read(1)
-                if next1 == '[':
-                    next2 = sys.stdin.read(1)
-                    if next2 == 'A':  # Up arrow
-                        current = (current - 1) % len(options)
-                        render()
-                    elif next2 == 'B':  # Down arrow
-                        current = (current + 1) % len(options)
-                        render()
+            if data == b'\x1b':
+                # Lone ESC and the start of an arrow sequence look the
+                # same; poll briefly for the rest before treating it as
+                # a quit
+                if select.select([fd], [], [], 0.05)[0]:
+                    data += os.read(fd, 8)
                 else:
-                    # ESC pressed (quit)
                     clear_screen()
                     show_cursor()
                     return None
-            elif ch in ('j', 'J'):  # Vim down
-                current = (current + 1) % len(options)
-                render()
-            elif ch in ('k', 'K'):  # Vim up
-                current = (current - 1) % len(options)
-                render()
-            elif ch in ('q', 'Q'):  # Quit
+
+            if data.startswith(b'\x1b['):
+                key = data[2:3]
+                if key == b'A':  # Up arrow
+                    prev, current = current, (current - 1) % len(options)
+                    move_selection(prev, current)
+                elif key == b'B':  # Down arrow
+                    prev, current = current, (current + 1) % len(options)
+                    move_selection(prev, current)
+            elif data.startswith(b'\x1b'):
+                # ESC pressed (quit)
+                clear_screen()
+                show_cursor()
+                return None
+            elif data in (b'j', b'J'):  # Vim down
+                prev, current = current, (current + 1) % len(options)
+                move_selection(prev, current)
+            elif data in (b'k', b'K'):  # Vim up
+                prev, current = current, (current - 1) % len(options)
+                move_selection(prev, current)
+            elif data in (b'q', b'Q'):  # Quit
                 clear_screen()
                 show_cursor()
                 return None
-            elif ch in ('\r', '\n'):  # Enter
+            elif data in (b'\r', b'\n'):  # Enter
                 clear_screen()
                 show_cursor()
                 return options[current]
-            elif ch == '\x03':  # Ctrl+C
+            elif data == b'\x03':  # Ctrl+C
                 clear_screen()
                 show_cursor()
                 raise KeyboardInterrupt
@@ -114,67 +195,71 @@ def select_option(options: List[Tuple[str, str]], title: str = "Select an option
 
 def tools():
     """Launch interactive AI tool selector (internal function)"""
-    import subprocess
-    
-    manager = AIModelManager()
+    manager = _get_manager()
     resources = manager.get_available_resources()
     
-    # Build options list
-    options = []
+    # Build the options list and the cloud/ollama split in one pass so
+    # each model is prefix-tested exactly once
+    options, cloud_models, ollama_models = [], [], []
     for model in resources["models"]:
-        label = f"{model[7:]} (Ollama)" if model.startswith("ollama:") else f"{model} (Cloud)"
-        options.append((label, f"model:{model}"))
-    
-    for tool in resources["cli_tools"]:
+        if model.startswith("ollama:"):
+            name = model[7:]
+            ollama_models.append(name)
+            options.append((f"{name} (Ollama)", f"model:{model}"))
+        else:
+            cloud_models.append(model)
+            options.append((f"{model} (Cloud)", f"model:{model}"))
+
+    cli_tools = resources["cli_tools"]
+    for tool in cli_tools:
         options.append((f"{tool} (CLI)", f"tool:{tool}"))
     
-    # Check if any tools available
+    # Check if any tools available - build the help text in one buffer
+    # and echo it with a single write
     if not options:
-        typer.echo("No AI tools found!\n")
-        typer.echo("Setup:")
-        typer.echo("  • Cloud models: ai-cli config -s provider=key")
-        typer.echo("  • Local models: Install Ollama (https://ollama.ai)")
-        typer.echo("  • CLI tools: Will be auto-detected from PATH")
-        
+        lines = [
+            "No AI tools found!\n",
+            "Setup:",
+            "  • Cloud models: ai-cli config -s provider=key",
+            "  • Local models: Install Ollama (https://ollama.ai)",
+            "  • CLI tools: Will be auto-detected from PATH",
+        ]
+
         # Show which providers are configured vs not configured
         status = manager.get_available_models()
         if status:
-            typer.echo(f"\nAvailable models: {', '.join(status)}")
+            lines.append(f"\nAvailable models: {', '.join(status)}")
         else:
-            typer.echo("\nNo models currently available.")
-            typer.echo("Configure at least one of: claude, gemini, qwen, or install Ollama")
-        
+            lines.append("\nNo models currently available.")
+            lines.append("Configure at least one of: claude, gemini, qwen, or install Ollama")
+
         # Check if we previously detected Node.js-based tools that are now missing
         from .config import ConfigManager
         config_manager = ConfigManager()
         known_node_tools = config_manager.get_known_node_tools()
         if known_node_tools:
-            available_tools = [tool for tool in known_node_tools if shutil.which(tool)]
             missing_tools = [tool for tool in known_node_tools if not shutil.which(tool)]
-            
+
             if missing_tools:
-                typer.echo(f"\n⚠️  Some previously detected tools are not available:")
-                for tool in missing_tools:
-                    typer.echo(f"   - {tool}")
-                typer.echo("\n  This may be due to Node.js version changes.")
-                typer.echo("  Consider reinstalling Node.js packages with: npm install -g <package-name>")
-        
+                lines.append("\n⚠️  Some previously detected tools are not available:")
+                lines.extend(f"   - {tool}" for tool in missing_tools)
+                lines.append("\n  This may be due to Node.js version changes.")
+                lines.append("  Consider reinstalling Node.js packages with: npm install -g <package-name>")
+
+        typer.echo("\n".join(lines))
         raise typer.Exit(code=1)
     
     # Display available models before selection
-    cloud_models = [model for model in resources["models"] if not model.startswith("ollama:")]
-    ollama_models = [model[7:] for model in resources["models"] if model.startswith("ollama:")]
-    cli_tools = resources["cli_tools"]
-    
     if cloud_models or ollama_models or cli_tools:
-        typer.echo("Available resources:")
+        lines = ["Available resources:"]
         if cloud_models:
-            typer.echo(f"  Cloud models: {', '.join(cloud_models)}")
+            lines.append(f"  Cloud models: {', '.join(cloud_models)}")
         if ollama_models:
-            typer.echo(f"  Ollama models: {', '.join(ollama_models)}")
+            lines.append(f"  Ollama models: {', '.join(ollama_models)}")
         if cli_tools:
-            typer.echo(f"  CLI tools: {', '.join(cli_tools)}")
-        typer.echo()
+            lines.append(f"  CLI tools: {', '.join(cli_tools)}")
+        lines.append("")
+        typer.echo("\n".join(lines))
     
     # Get user selection
     try:
@@ -195,11 +280,51 @@ def tools():
     elif resource_type == "tool":
         _run_cli_tool(manager, resource_name)
 
-def _run_chat_session(manager: AIModelManager, model_name: str):
+def _enable_prompt_history():
+    """Enable line editing and persistent history for chat prompts
+
+    typer.prompt reads via input(), so loading readline gives arrow-key
+    recall and in-place editing for free. No-op on platforms without
+    readline.
+    """
+    try:
+        import atexit
+        import readline
+    except ImportError:
+        return
+
+    history_file = os.path.expanduser("~/.ai-cli/history")
+    try:
+        os.makedirs(os.path.dirname(history_file), exist_ok=True)
+        readline.read_history_file(history_file)
+    except OSError:
+        pass
+    atexit.register(readline.write_history_file, history_file)
+
+def _run_chat_session(manager: "AIModelManager", model_name: str):
     """Run interactive chat session with a model"""
-    typer.echo(f"\n💬 Chat session: {model_name}")
-    typer.echo("Type 'exit', 'quit', or 'q' to end\n")
-    
+    _enable_prompt_history()
+    typer.echo(f"\n💬 Chat session: {model_name}\nType 'exit', 'quit', or 'q' to end\n")
+
+    # Resolve the model to its streaming callable once so each turn is a
+    # single call instead of re-matching the model name
+    if model_name.startswith("ollama:"):
+        ollama_name = model_name[7:]
+        # Pin the weights in server memory now so the first prompt
+        # starts generating instead of waiting on the model load
+        manager.preload_models([ollama_name])
+        stream_response = lambda p: manager.ollama_stream(p, ollama_name)
+    elif model_name == "claude":
+        stream_response = manager.claude_stream
+    elif model_name == "gemini":
+        stream_response = manager.gemini_stream
+    else:
+        stream_response = lambda p: iter([manager.chat(model_name, p)])
+
+    # Bind the stdout methods once - the streaming loop calls them per
+    # chunk and doesn't need the attribute walk every time
+    write, flush = sys.stdout.write, sys.stdout.flush
+
     while True:
         try:
             user_input = typer.prompt("You", prompt_suffix=": ")
@@ -207,8 +332,15 @@ def _run_chat_session(manager: AIModelManager, model_name: str):
                 typer.echo("Goodbye! 👋")
                 break
             
-            response = manager.chat(model_name, user_input)
-            typer.echo(f"{model_name}: {response}\n")
+            # Stream chunks to the terminal as they arrive instead of
+            # waiting for the full response
+            write(f"{model_name}: ")
+            flush()
+            for chunk in stream_response(user_input):
+                write(chunk)
+                flush()
+            write("\n\n")
+            flush()
             
         except KeyboardInterrupt:
             typer.echo("\n\nSession ended.")
@@ -217,26 +349,29 @@ def _run_chat_session(manager: AIModelManager, model_name: str):
             typer.echo(f"❌ Error: {str(e)}")
             break
 
-def _run_cli_tool(manager: AIModelManager, tool_name: str):
-    """Launch external CLI tool using absolute path"""
-    import subprocess
-    
+def _run_cli_tool(manager: "AIModelManager", tool_name: str):
+    """Launch external CLI tool using absolute path
+
+    The tool replaces this process via exec - there is nothing left to
+    do here once it starts, so no reason to keep a forked Python parent
+    resident just to wait on it. Only returns if the exec fails.
+    """
     # Get absolute path from manager
     tool_path = manager.tool_paths.get(tool_name, tool_name)
-    
+
     try:
-        subprocess.run([tool_path])
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execvp(tool_path, [tool_name])
     except FileNotFoundError:
         typer.echo(f"❌ '{tool_name}' not found")
         typer.echo(f"Try: ai-cli config -a {tool_name}")
-    except KeyboardInterrupt:
-        typer.echo("\n")
-    except Exception as e:
+    except OSError as e:
         typer.echo(f"❌ Error running {tool_name}: {str(e)}")
 
 def config(
     ctx: typer.Context,
-    set_key: Optional[str] = typer.Option(None, "--set", "-s", help="Set API key (provider=key)"),
+    set_key: Optional[List[str]] = typer.Option(None, "--set", "-s", help="Set API key (provider=key, repeatable)"),
     add_tool: Optional[str] = typer.Option(None, "--add", "-a", help="Add custom tool"),
     remove_tool: Optional[str] = typer.Option(None, "--remove", "-r", help="Remove custom tool"),
     list_status: bool = typer.Option(False, "--list", "-l", help="Show configuration"),
@@ -244,6 +379,8 @@ def config(
     reset: bool = typer.Option(False, "--reset", help="Reset all")
 ):
     """Configuration options"""
+    from .config import ConfigManager
+
     config_manager = ConfigManager()
     
     if reset:
@@ -257,26 +394,31 @@ def config(
         return
     
     if set_key:
-        if '=' not in set_key:
-            typer.echo("Format: provider=key")
-            raise typer.Exit(code=1)
-        
-        provider, key = set_key.split('=', 1)
-        provider = provider.strip().lower()
-        key = key.strip()
-        
-        if provider not in ['claude', 'gemini', 'qwen']:
-            typer.echo(f"Unsupported: {provider}. Use: claude, gemini, qwen")
-            raise typer.Exit(code=1)
-        
-        if config_manager.set_api_key(provider, key):
-            typer.echo(f"{provider.upper()} key set.")
+        # Validate every pair first, then commit them in one config write
+        pairs = {}
+        for entry in set_key:
+            if '=' not in entry:
+                typer.echo("Format: provider=key")
+                raise typer.Exit(code=1)
+
+            provider, key = entry.split('=', 1)
+            provider = provider.strip().lower()
+            key = key.strip()
+
+            if provider not in _SUPPORTED_PROVIDERS:
+                typer.echo(f"Unsupported: {provider}. Use: claude, gemini, qwen")
+                raise typer.Exit(code=1)
+
+            pairs[provider] = key
+
+        if config_manager.set_api_keys(pairs):
+            for provider in pairs:
+                typer.echo(f"{provider.upper()} key set.")
         else:
-            typer.echo(f"Failed to set {provider.upper()} key.")
+            typer.echo(f"Failed to set {', '.join(p.upper() for p in pairs)} key.")
         return
     
     if add_tool:
-        import shutil
         if not shutil.which(add_tool):
             typer.echo(f"Warning: '{add_tool}' not found in PATH")
         
@@ -296,20 +438,20 @@ def config(
     if list_tools:
         custom = config_manager.get_custom_cli_tools()
         excluded = config_manager.get_excluded_cli_tools()
-        
-        typer.echo("Custom CLI Tools:")
+
+        lines = ["Custom CLI Tools:"]
         if custom:
-            for tool in custom:
-                typer.echo(f"  + {tool}")
+            lines.extend(f"  + {tool}" for tool in custom)
         else:
-            typer.echo("  (none)")
-        
-        typer.echo("\nExcluded CLI Tools:")
+            lines.append("  (none)")
+
+        lines.append("\nExcluded CLI Tools:")
         if excluded:
-            for tool in excluded:
-                typer.echo(f"  - {tool}")
+            lines.extend(f"  - {tool}" for tool in excluded)
         else:
-            typer.echo("  (none)")
+            lines.append("  (none)")
+
+        typer.echo("\n".join(lines))
         return
     
     if list_status or not (set_key or add_tool):
@@ -322,10 +464,39 @@ def config(
             if info['configured']:
                 typer.echo(f"    Preview: {info['key_preview']}")
 
+@app.command()
+def compare(
+    ctx: typer.Context,
+    prompt: str = typer.Argument(..., help="Prompt to send to every available model"),
+    output: Optional[str] = typer.Option(None, "--output", "-o", help="Write the comparison to a file")
+):
+    """Compare responses from all available models"""
+    manager = (ctx.obj or _get_manager)()
+    responses = manager.compare_models(prompt)
+
+    if not responses:
+        typer.echo("No models available. Configure an API key or install Ollama.")
+        raise typer.Exit(code=1)
+
+    # Collect sections and join once - repeated += on a string is
+    # quadratic in total output size, and one echo means one write
+    parts = [
+        (_COMPARE_HEADERS.get(model) or f"\n--- {model.upper()} ---\n") + f"{response}\n"
+        for model, response in responses.items()
+    ]
+    typer.echo("".join(parts), nl=False)
+
+    if output:
+        # Hand the sections straight to the buffered writer - no need to
+        # build a second joined copy of the report just for the file
+        with open(output, 'w', buffering=1024 * 1024) as f:
+            f.writelines(parts)
+        typer.echo(f"\nSaved to {output}")
+
 @app.callback(invoke_without_command=True)
 def main(
     ctx: typer.Context,
-    set_key: Optional[str] = typer.Option(None, "--set", "-s", help="Set API key (provider=key)"),
+    set_key: Optional[List[str]] = typer.Option(None, "--set", "-s", help="Set API key (provider=key, repeatable)"),
     add_tool: Optional[str] = typer.Option(None, "--add", "-a", help="Add custom tool"),
     remove_tool: Optional[str] = typer.Option(None, "--remove", "-r", help="Remove custom tool"),
     list_status: bool = typer.Option(False, "--list", "-l", help="Show configuration"),
@@ -337,6 +508,11 @@ def main(
     
     Run without options to launch interactive tool selector.
     """
+    # Commands share the manager factory through the context; the
+    # factory is cached, so whoever calls it first builds the single
+    # per-process instance and config-only invocations never construct it
+    ctx.obj = _get_manager
+
     # Handle config options if provided
     if any([set_key, add_tool, remove_tool, list_status, list_tools, reset]):
         config(ctx, set_key, add_tool, remove_tool, list_status, list_tools, reset)
@@ -4,14 +4,52 @@ import json
 from pathlib import Path
 from typing import Optional, List, Dict
 
+# Supported cloud providers and their environment variable names,
+# built once instead of re-formatted on every key lookup
+PROVIDERS = ("claude", "gemini", "qwen")
+ENV_KEYS = {provider: f"{provider.upper()}_API_KEY" for provider in PROVIDERS}
+
+# System tools that are never AI CLIs - allocated once at import as a
+# frozenset so membership checks during the PATH scan are O(1) hashes
+DEFAULT_EXCLUDED_TOOLS = frozenset({
+    'ai-cli', 'node', 'npm', 'npx', 'python', 'python3', 'pip',
+    'bash', 'sh', 'corepack', 'yarn', 'pnpm', 'ollama',
+})
+
+
 class ConfigManager:
+    # .env parsing is deferred until a key is actually looked up, so
+    # commands that never touch provider keys skip it entirely
+    _dotenv_loaded = False
+
+    @classmethod
+    def _ensure_dotenv(cls):
+        """Load .env at most once per process tree
+
+        The environment marker survives fork/exec, so child ai-cli
+        processes inherit the loaded variables and skip the re-parse.
+        """
+        if cls._dotenv_loaded:
+            return
+        cls._dotenv_loaded = True
+        if os.environ.get("_AI_CLI_DOTENV_LOADED"):
+            return
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        os.environ["_AI_CLI_DOTENV_LOADED"] = "1"
+
     def __init__(self):
         self.config_dir = Path.home() / ".ai-cli"
         self.config_file = self.config_dir / "config.json"
         self.env_file = Path.cwd() / ".env"
         if not self.env_file.exists():
             self.env_file = Path.home() / ".env"
-        
+
+        # Parsed-config cache, keyed on the file's mtime
+        self._cache = None
+        self._cache_mtime = -1
+
         self.ensure_config_dir()
     
     def ensure_config_dir(self):
@@ -19,51 +57,105 @@ class ConfigManager:
         self.config_dir.mkdir(exist_ok=True)
     
     def _load_config(self) -> Dict:
-        """Load config from file, return empty dict if not exists or invalid"""
-        if not self.config_file.exists():
+        """Load config from file, return empty dict if not exists or invalid
+
+        The parsed dict is cached against the file's mtime, so the many
+        small getters that call this within one invocation share a
+        single open+parse instead of re-reading the JSON every time.
+        """
+        try:
+            mtime = self.config_file.stat().st_mtime_ns
+        except OSError:
             return {}
+
+        if mtime == self._cache_mtime and self._cache is not None:
+            return self._cache
+
         try:
-            with open(self.config_file, 'r') as f:
-                return json.load(f)
+            # Read the raw bytes in one call and decode once - cheaper
+            # than streaming the file through a text wrapper
+            config = json.loads(self.config_file.read_bytes())
         except (json.JSONDecodeError, IOError):
             return {}
+
+        self._cache = config
+        self._cache_mtime = mtime
+        return config
     
     def _save_config(self, config: Dict) -> bool:
-        """Save config to file"""
+        """Save config atomically via a temp file and rename
+
+        Writing the target in 'w' mode truncates it first, so a crash
+        mid-write loses the whole config; fsync + os.replace swaps the
+        finished file in without ever exposing a half-written state.
+        """
+        tmp = self.config_file.with_suffix(self.config_file.suffix + ".tmp")
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(config, f, indent=2)
+            with open(tmp, 'w') as f:
+                # Compact form - the file is parsed on nearly every CLI
+                # start, and indentation roughly doubles its size
+                json.dump(config, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.config_file)
+            # Keep the read cache in sync so the save is also a warm read
+            self._cache = config
+            self._cache_mtime = self.config_file.stat().st_mtime_ns
             return True
-        except IOError:
+        except (IOError, OSError):
+            try:
+                tmp.unlink(missing_ok=True)
+            except OSError:
+                pass
             return False
     
     def get_api_key(self, provider: str) -> Optional[str]:
         """Get API key for a specific provider (env var takes precedence)"""
-        env_key = os.getenv(f"{provider.upper()}_API_KEY")
+        self._ensure_dotenv()
+        provider = provider.lower()
+        # Known providers hit the prebuilt env-key map; unknown ones
+        # still fall back to formatting the name
+        env_key = os.environ.get(ENV_KEYS.get(provider) or f"{provider.upper()}_API_KEY")
         if env_key:
             return env_key
-        
+
         config = self._load_config()
-        return config.get("api_keys", {}).get(provider.lower())
+        return config.get("api_keys", {}).get(provider)
     
     def set_api_key(self, provider: str, key: str) -> bool:
         """Set API key for a specific provider"""
-        os.environ[f"{provider.upper()}_API_KEY"] = key
-        
+        return self.set_api_keys({provider: key})
+
+    def set_api_keys(self, keys: Dict[str, str]) -> bool:
+        """Set API keys for several providers with one read-modify-write"""
         config = self._load_config()
-        if "api_keys" not in config:
-            config["api_keys"] = {}
-        config["api_keys"][provider.lower()] = key
-        
+        api_keys = config.setdefault("api_keys", {})
+
+        for provider, key in keys.items():
+            provider = provider.lower()
+            os.environ[ENV_KEYS.get(provider) or f"{provider.upper()}_API_KEY"] = key
+            api_keys[provider] = key
+
         return self._save_config(config)
     
     def get_providers_status(self) -> dict:
         """Get status of all configured providers"""
-        providers = ["claude", "gemini", "qwen"]
+        self._ensure_dotenv()
         status = {}
-        
-        for provider in providers:
-            key = self.get_api_key(provider)
+
+        # One pass over os.environ and one config read cover all
+        # providers - no per-provider get_api_key round-trips
+        env = os.environ
+        env_keys = {provider: env.get(ENV_KEYS[provider]) for provider in PROVIDERS}
+        # When every key lives in the environment (the .env case) the
+        # config file never has to be touched at all
+        if all(env_keys.values()):
+            api_keys = {}
+        else:
+            api_keys = self._load_config().get("api_keys", {})
+
+        for provider in PROVIDERS:
+            key = env_keys[provider] or api_keys.get(provider)
             status[provider] = {
                 "configured": bool(key and key.strip()),
                 "key_preview": f"{key[:4]}..." if key and len(key) > 4 else "Not set"
@@ -79,10 +171,9 @@ class ConfigManager:
         """Get list of excluded CLI tools from config"""
         return self._load_config().get("excluded_cli_tools", [])
     
-    def get_default_excluded_tools(self) -> List[str]:
+    def get_default_excluded_tools(self) -> frozenset:
         """Get default system tools always excluded"""
-        return ['ai-cli', 'node', 'npm', 'npx', 'python', 'python3', 'pip', 
-                'bash', 'sh', 'corepack', 'yarn', 'pnpm', 'ollama']
+        return DEFAULT_EXCLUDED_TOOLS
     
     def get_ai_tool_patterns(self) -> Dict:
         """Get configurable AI tool detection patterns"""
@@ -100,14 +191,12 @@ class ConfigManager:
     def add_custom_cli_tool(self, tool: str) -> bool:
         """Add a custom CLI tool to config"""
         config = self._load_config()
-        
-        if "custom_cli_tools" not in config:
-            config["custom_cli_tools"] = []
-        
-        if tool not in config["custom_cli_tools"]:
-            config["custom_cli_tools"].append(tool)
+        tools = config.setdefault("custom_cli_tools", [])
+
+        if tool not in tools:
+            tools.append(tool)
             return self._save_config(config)
-        
+
         return True  # Already exists
     
     def remove_custom_cli_tool(self, tool: str) -> bool:
@@ -127,5 +216,7 @@ class ConfigManager:
     def set_known_node_tools(self, tools: List[str]) -> bool:
         """Store known Node.js-based CLI tools for reference"""
         config = self._load_config()
-        config["known_node_tools"] = list(set(tools))  # Remove duplicates
+        # dict.fromkeys dedupes while keeping first-seen order, so the
+        # stored list is stable across runs (a set would reshuffle it)
+        config["known_node_tools"] = list(dict.fromkeys(tools))
         return self._save_config(config)
\ No newline at end of file
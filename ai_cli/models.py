@@ -1,10 +1,19 @@
 """AI model management module"""
+import asyncio
+import atexit
+import functools
 import os
-from typing import Dict, Optional
-import anthropic
-import google.generativeai as genai
+import re
+import stat
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import httpx
 import subprocess
 import json
+import time
+
+from .config import PROVIDERS, ConfigManager
 # Import for Qwen if available
 try:
     import dashscope
@@ -12,32 +21,148 @@ try:
 except ImportError:
     DASHSCOPE_AVAILABLE = False
 
+# Discovery results (ollama probe, PATH scan) shared across
+# AIModelManager instances, keyed by the environment that determines
+# them so a PATH change invalidates naturally. The short TTL keeps the
+# cache honest about models being pulled or tools being installed
+# mid-session.
+_DISCOVERY_CACHE: Dict[tuple, tuple] = {}
+_DISCOVERY_TTL = 30.0
+
+# (timestamp, (available, models)) from the last ollama probe, shared
+# across managers the same way; None until a probe has run
+_OLLAMA_PROBE: Optional[tuple] = None
+
+# Sentinel distinguishing "client not built yet" from "no key, so None"
+_UNSET = object()
+
+# Ollama's local REST API; answers in milliseconds when the server is
+# up, versus a fork+exec of the ollama CLI per probe
+_OLLAMA_TAGS_URL = "http://127.0.0.1:11434/api/tags"
+_OLLAMA_GENERATE_URL = "http://127.0.0.1:11434/api/generate"
+
+# Name fragments marking tools that typically live under a Node.js
+# version manager and can vanish when the active version changes
+_NODE_TOOL_INDICATORS = ('node_modules', 'npm', 'yarn', 'pnpm',
+                         'claude', 'gemini', 'chatgpt', 'gpt', 'ai', 'llm')
+
+
+@functools.lru_cache(maxsize=1)
+def _get_http_client() -> httpx.Client:
+    """One HTTP connection pool per process
+
+    Passed to every SDK that accepts an external client and used for the
+    Ollama REST calls, so a second AIModelManager reuses warm TCP
+    connections and TLS sessions instead of re-handshaking.
+    """
+    client = httpx.Client(
+        # HTTP/2 multiplexes concurrent compare_models requests to the
+        # same provider host over one TLS session; servers that only
+        # speak HTTP/1.1 (Ollama's local API) negotiate down cleanly
+        http2=True,
+        timeout=httpx.Timeout(60.0, connect=3.0),
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10,
+                            keepalive_expiry=60.0),
+    )
+    atexit.register(client.close)
+    return client
+
+
+@functools.lru_cache(maxsize=1)
+def _get_config_manager() -> ConfigManager:
+    """One shared ConfigManager per process
+
+    Its mtime-keyed read cache then serves every caller, instead of each
+    call site constructing a fresh instance with a cold cache.
+    """
+    return ConfigManager()
+
+
+@functools.lru_cache(maxsize=1)
+def _load_scan_patterns(config_manager, config_mtime):
+    """Derive the PATH-scan pattern sets and regexes, once per config version
+
+    Keyed on the config manager and its file's mtime, so an edit
+    invalidates the cache and a caller-supplied manager (rather than
+    the process-wide one) gets patterns from its own config; every
+    manager built against an unchanged config shares one set of
+    frozensets and compiled regexes instead of re-deriving them.
+    """
+    # Interned members hash-compare by pointer on the common miss path
+    # of the per-file membership tests
+    excluded = frozenset(map(sys.intern, config_manager.get_default_excluded_tools())).union(
+        map(sys.intern, config_manager.get_excluded_cli_tools()))
+
+    patterns = config_manager.get_ai_tool_patterns()
+    exact_matches = frozenset(map(sys.intern, patterns.get("exact_matches", [])))
+    prefixes = patterns.get("prefixes", [])
+    suffixes = patterns.get("suffixes", [])
+    suffix_exclusions = patterns.get("suffix_exclusions", [])
+
+    # Compile each pattern category into one regex up front - a single
+    # C-level match per file instead of a Python-level
+    # startswith/endswith loop over every pattern
+    prefix_re = re.compile("|".join(map(re.escape, prefixes))) if prefixes else None
+    suffix_re = re.compile("(?:" + "|".join(map(re.escape, suffixes)) + ")$") if suffixes else None
+    exclusion_re = re.compile("|".join(map(re.escape, suffix_exclusions))) if suffix_exclusions else None
+
+    custom_tools = tuple(config_manager.get_custom_cli_tools())
+
+    return excluded, exact_matches, prefix_re, suffix_re, exclusion_re, custom_tools
+
 class AIModelManager:
-    def __init__(self):
+    # Guard-failure messages, allocated once at class creation and
+    # returned by reference instead of rebuilt per call
+    _QWEN_NO_PKG = "Qwen integration requires the dashscope package. Install it with: pip install dashscope"
+    _QWEN_NO_KEY = "Qwen API key not configured. Please set QWEN_API_KEY environment variable."
+    _CLAUDE_NO_KEY = "Claude API key not configured. Please set CLAUDE_API_KEY environment variable."
+    _GEMINI_NO_KEY = "Gemini API key not configured. Please set GEMINI_API_KEY environment variable."
+    _OLLAMA_DOWN = "Ollama is not available. Please install and start Ollama server."
+
+    # Every failure reply a wrapper can produce starts with one of these
+    # prefixes or carries one of the substrings checked in _is_error;
+    # new failure strings must keep that invariant so chat() never
+    # caches them
+    _ERROR_PREFIXES = ("Error", "Timeout calling", "Unknown model",
+                       "No response", "Qwen integration requires")
+
+    # Declarative provider registry: model name -> (blocking method,
+    # streaming method or None for the one-chunk fallback). Adding a
+    # backend means one row here plus its wrapper methods - the
+    # dispatchers below are built from this table.
+    _PROVIDER_TABLE = {
+        "qwen": ("qwen", None),
+        "claude": ("claude", "claude_stream"),
+        "gemini": ("gemini", "gemini_stream"),
+    }
+
+    def __init__(self, config_manager: Optional[ConfigManager] = None):
+        # Reuse the process-wide ConfigManager (and its warm read cache)
+        # unless the caller supplies their own
+        self._config = config_manager or _get_config_manager()
         # Initialize API clients
         self._setup_apis()
-    
+
     def _setup_apis(self):
         """Set up API clients for different AI models"""
         # Get API keys from environment or config
-        from .config import ConfigManager
-        config_manager = ConfigManager()
-        
-        # Anthropic (for Claude)
-        claude_api_key = os.getenv("CLAUDE_API_KEY") or config_manager.get_api_key("claude")
-        if claude_api_key:
-            self.claude_client = anthropic.Anthropic(api_key=claude_api_key)
-        else:
-            self.claude_client = None
-            
-        # Google (for Gemini)
-        gemini_api_key = os.getenv("GEMINI_API_KEY") or config_manager.get_api_key("gemini")
-        if gemini_api_key:
-            genai.configure(api_key=gemini_api_key)
-            self.gemini_model = genai.GenerativeModel('gemini-pro')
-        else:
-            self.gemini_model = None
-            
+        config_manager = self._config
+
+        # Process-wide HTTP client shared by every SDK that can accept
+        # it, so keep-alive connections (and TLS sessions) survive both
+        # repeat calls and repeat manager construction
+        self._http_client = _get_http_client()
+
+        # Keys are resolved now; each SDK import and client build is
+        # deferred to the first read of the matching property, so a
+        # session that only talks to one provider never pays for the
+        # others
+        self._claude_api_key = os.getenv("CLAUDE_API_KEY") or config_manager.get_api_key("claude")
+        self._claude_client = _UNSET
+        self._gemini_api_key = os.getenv("GEMINI_API_KEY") or config_manager.get_api_key("gemini")
+        self._gemini_model = _UNSET
+
+
         # Qwen/Tongyi (using dashscope)
         qwen_api_key = os.getenv("QWEN_API_KEY") or config_manager.get_api_key("qwen")
         if qwen_api_key and DASHSCOPE_AVAILABLE:
@@ -46,46 +171,178 @@ class AIModelManager:
         else:
             self.qwen_enabled = False
             
-        # Ollama local models
-        self.ollama_available = self._check_ollama_availability()
-        if self.ollama_available:
-            self.ollama_models = self._get_ollama_models()
+        # PATH scan is the slow eager part of construction; reuse a
+        # recent result from another instance when the environment
+        # matches. The config file path is part of the key so a manager
+        # built on an injected config never serves (or poisons) the
+        # results of the default one
+        key = (os.environ.get("PATH", ""), os.environ.get("HOME", ""),
+               str(config_manager.config_file))
+        cached = _DISCOVERY_CACHE.get(key)
+        if cached is not None and time.monotonic() - cached[0] < _DISCOVERY_TTL:
+            self.available_cli_tools, self.tool_paths = cached[1]
         else:
-            self.ollama_models = []
-            
-        # Available AI CLI tools
-        self.available_cli_tools = self._check_cli_availability()
+            # Also populates self.tool_paths
+            self.available_cli_tools = self._check_cli_availability()
+            _DISCOVERY_CACHE[key] = (time.monotonic(), (
+                self.available_cli_tools, self.tool_paths))
+
+        # Models already pinned in server memory via preload_models
+        self._warmed_models = set()
+
+        # The ollama probe is deferred to the first read of
+        # ollama_available / ollama_models - construction never blocks
+        # on a server that might not be there
+        self._ollama_probed = False
+        self._ollama_available = False
+        self._ollama_models = []
+        self._ollama_models_set = frozenset()
+        self._ollama_models_listing = 'None'
+
+        # Lazily computed by get_available_models - the set can only
+        # change when _setup_apis reruns
+        self._available_models = None
+
+        # Jump tables for chat dispatch, bound once from the declarative
+        # provider table - one dict hit instead of walking an elif chain
+        # per call (ollama:* names are dynamic and stay a prefix special
+        # case in the dispatchers)
+        self._dispatch = {
+            name: getattr(self, blocking)
+            for name, (blocking, _) in self._PROVIDER_TABLE.items()
+        }
+        self._stream_dispatch = {
+            name: getattr(self, streaming)
+            for name, (_, streaming) in self._PROVIDER_TABLE.items()
+            if streaming is not None
+        }
+
+        # Repeated-prompt cache; AI_CLI_NO_CACHE=1 disables it
+        from .cache import ResponseCache
+        self.response_cache = None if os.environ.get("AI_CLI_NO_CACHE") else ResponseCache()
+
+    def close(self):
+        """Close the process-wide HTTP connection pool
+
+        Also closed automatically at interpreter exit; only call this
+        once no manager in the process will make further requests.
+        """
+        if self._http_client is not None and not self._http_client.is_closed:
+            self._http_client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def claude_client(self):
+        """Anthropic client, built (and its SDK imported) on first use
+
+        When compare_models fans out on threads, each provider's first
+        call builds its client inside its own worker - so construction
+        is parallel for free. A duplicate build from a racing thread is
+        benign: the clients are equivalent and the last assignment wins.
+
+        The SDK manages its own pooled transport; newer anthropic
+        releases vendor their own httpx fork and reject a plain
+        httpx.Client passed as http_client=, so the shared client is
+        not handed in here.
+        """
+        if self._claude_client is _UNSET:
+            if self._claude_api_key:
+                import anthropic
+
+                self._claude_client = anthropic.Anthropic(
+                    api_key=self._claude_api_key)
+            else:
+                self._claude_client = None
+        return self._claude_client
+
+    @property
+    def gemini_model(self):
+        """Gemini model handle, built on first use
+
+        google.generativeai drags in grpc and protobuf, the heaviest
+        import in the dependency set - deferred until a Gemini call
+        actually happens.
+        """
+        if self._gemini_model is _UNSET:
+            if self._gemini_api_key:
+                import google.generativeai as genai
+
+                genai.configure(api_key=self._gemini_api_key)
+                self._gemini_model = genai.GenerativeModel('gemini-pro')
+            else:
+                self._gemini_model = None
+        return self._gemini_model
+
+    @property
+    def ollama_available(self) -> bool:
+        """Whether a local Ollama server answers (probed on first use)"""
+        self._ensure_ollama_probed()
+        return self._ollama_available
+
+    @property
+    def ollama_models(self) -> List[str]:
+        """Locally available Ollama models (probed on first use)"""
+        self._ensure_ollama_probed()
+        return self._ollama_models
+
+    def _ensure_ollama_probed(self):
+        """Run the ollama probe at most once per manager, lazily
+
+        Commands that never touch a model (tool launch, config) skip the
+        probe entirely; the result is shared across managers through the
+        module cache like the PATH scan.
+        """
+        if self._ollama_probed:
+            return
+        self._ollama_probed = True
+
+        global _OLLAMA_PROBE
+        if _OLLAMA_PROBE is not None and time.monotonic() - _OLLAMA_PROBE[0] < _DISCOVERY_TTL:
+            self._ollama_available, self._ollama_models = _OLLAMA_PROBE[1]
+        else:
+            self._ollama_available, self._ollama_models = self._probe_ollama()
+            _OLLAMA_PROBE = (time.monotonic(), (self._ollama_available, self._ollama_models))
+
+        # Frozenset for the per-call membership check in ollama_model/
+        # ollama_stream, and the unknown-model message built once rather
+        # than re-joined on every miss
+        self._ollama_models_set = frozenset(self._ollama_models)
+        self._ollama_models_listing = ', '.join(self._ollama_models) if self._ollama_models else 'None'
+
+    def _probe_ollama(self) -> tuple:
+        """Answer availability and the model list with one round-trip
+
+        One GET against the local REST API replaces the `ollama list`
+        subprocess (fork+exec plus a 5s timeout) and already carries the
+        model list. The subprocess fallback - for setups where the
+        server answers the CLI but not the default HTTP port - parses
+        the same output it detects the server with, so either path is a
+        single probe.
+        """
+        try:
+            # Through the shared client, so the probe's connection is
+            # the same keep-alive socket later generate calls reuse
+            response = self._http_client.get(_OLLAMA_TAGS_URL, timeout=0.5)
+            if response.status_code == 200:
+                return True, [m["name"] for m in response.json().get("models", [])]
+        except (httpx.HTTPError, ValueError, KeyError):
+            pass
 
-    def _check_ollama_availability(self) -> bool:
-        """Check if Ollama is available on the system"""
         try:
             result = subprocess.run(['ollama', 'list'], capture_output=True, text=True, timeout=5)
-            return result.returncode == 0
         except (subprocess.SubprocessError, FileNotFoundError, subprocess.TimeoutExpired):
             # Ollama is not installed or not running
-            return False
-
-    def _get_ollama_models(self) -> list:
-        """Get list of locally available Ollama models"""
-        if not self.ollama_available:
-            return []
-        
-        try:
-            result = subprocess.run(['ollama', 'list'], capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                # Skip header line and parse model names
-                models = []
-                for line in lines[1:]:  # Skip header
-                    if line.strip():
-                        # Extract model name from ollama list output format
-                        model_name = line.split()[0]  # First column is model name
-                        if model_name:
-                            models.append(model_name)
-                return models
-            return []
-        except Exception:
-            return []
+            return False, []
+        if result.returncode != 0:
+            return False, []
+        # One C-level regex pass pulls the first column of every line;
+        # [1:] drops the header row
+        return True, re.findall(r'^(\S+)', result.stdout, re.MULTILINE)[1:]
 
     def _check_cli_availability(self) -> list:
         """
@@ -94,100 +351,130 @@ class AIModelManager:
         Detection strategy:
         1. Scans all PATH directories for executable files
         2. Matches tools against configurable patterns (exact names, prefixes, suffixes)
-        3. Verifies tools are actually in current PATH (handles Node.js version switches)
-        4. Adds custom tools from config
-        5. Tracks Node.js-based tools for environment change detection
-        
+        3. Adds custom tools from config
+        4. Tracks Node.js-based tools for environment change detection
+
         Returns:
             Sorted list of available AI CLI tool names
-            
+
         Edge cases handled:
-        - Node.js version changes: Uses shutil.which() to verify PATH accessibility
+        - Scanned tools need no shutil.which() re-check: the scan itself
+          proved existence and executability in the directory where each
+          was found, and records that path; only custom tools (never
+          proven by the scan) go through shutil.which()
         - Permission errors: Silently skips inaccessible directories
-        - Symlinks and broken links: Checked via os.access() and shutil.which()
         - Duplicate tool names: Tracked via 'seen' set
         - Custom vs auto-detected conflicts: Custom tools added after auto-detection
         """
         import shutil
-        from pathlib import Path
-        from .config import ConfigManager
-        
-        config_manager = ConfigManager()
+
+        # The injected config manager (not the process-wide one) governs
+        # exclusions, patterns, custom tools and the node-tools write
+        config_manager = self._config
         candidates = {}  # Changed to dict to store {name: full_path}
         seen = set()
-        
-        excluded = set(config_manager.get_default_excluded_tools())
-        excluded.update(config_manager.get_excluded_cli_tools())
-        
-        patterns = config_manager.get_ai_tool_patterns()
-        exact_matches = set(patterns.get("exact_matches", []))
-        prefixes = patterns.get("prefixes", [])
-        suffixes = patterns.get("suffixes", [])
-        suffix_exclusions = patterns.get("suffix_exclusions", [])
-        
-        # Get directories to scan: Node.js version managers first, then PATH
+        node_tools = []  # Node.js-based tools, tagged during the scan
+
+        try:
+            config_mtime = config_manager.config_file.stat().st_mtime_ns
+        except OSError:
+            config_mtime = -1
+        (excluded, exact_matches, prefix_re, suffix_re,
+         exclusion_re, custom_tools) = _load_scan_patterns(config_manager, config_mtime)
+
+        # Get directories to scan: Node.js version managers first, then
+        # PATH, deduplicated in order
         node_dirs = self._get_node_version_dirs()
-        path_dirs = os.environ.get('PATH', '').split(os.pathsep)
-        
-        # Combine and deduplicate
-        all_dirs = node_dirs + path_dirs
-        seen_dirs = set()
-        scan_dirs = []
-        for d in all_dirs:
-            if d not in seen_dirs:
-                seen_dirs.add(d)
-                scan_dirs.append(d)
-        
+        # Drop empty entries (doubled separators make '' resolve to the
+        # current directory, which can be an arbitrarily large repo) and
+        # relative entries - both string tests, no syscalls
+        path_dirs = [p for p in os.environ.get('PATH', '').split(os.pathsep)
+                     if p and os.path.isabs(p)]
+        scan_dirs = dict.fromkeys(node_dirs + path_dirs)
+
+        # PATH entries are often the same directory under two spellings
+        # (symlinked /bin, duplicated brew prefixes); remember what was
+        # actually scanned by (device, inode) so each one is walked once
+        scanned = set()
+
         for path_dir in scan_dirs:
             try:
-                path_obj = Path(path_dir)
-                if not path_obj.exists() or not path_obj.is_dir():
+                # One stat answers existence and directory-ness together,
+                # where exists() + is_dir() cost two
+                st = os.stat(path_dir)
+                if not stat.S_ISDIR(st.st_mode):
                     continue
-                
-                for item in path_obj.iterdir():
-                    if not item.is_file() or item.name in seen or item.name in excluded:
-                        continue
-                    
-                    if not os.access(str(item), os.X_OK):
-                        continue
-                    
-                    name = item.name
-                    name_lower = name.lower()
-                    
-                    # Skip if already found (prefer earlier directories)
-                    if name in seen:
-                        continue
-                    
-                    matches_pattern = (
-                        name_lower in exact_matches or
-                        any(name_lower.startswith(prefix) for prefix in prefixes) or
-                        (any(name_lower.endswith(suffix) for suffix in suffixes) and 
-                         not any(exclusion in name_lower for exclusion in suffix_exclusions))
-                    )
-                    
-                    if matches_pattern:
-                        candidates[name] = str(item.absolute())
-                        seen.add(name)
-                        
+                dir_key = (st.st_dev, st.st_ino)
+                if dir_key in scanned:
+                    continue
+                scanned.add(dir_key)
+
+                # os.scandir hands back the file type straight from the
+                # directory listing, so most entries are classified
+                # without the extra stat that Path.iterdir + is_file pays
+                with os.scandir(path_dir) as entries:
+                    for entry in entries:
+                        name = entry.name
+                        # Skip if already found (prefer earlier
+                        # directories) or excluded - string checks come
+                        # before any syscall
+                        if name in seen or name in excluded:
+                            continue
+
+                        if not entry.is_file():
+                            continue
+
+                        # The DirEntry caches its stat result, so this
+                        # bit test costs at most one syscall (none when
+                        # is_file already fetched it), where os.access
+                        # issues a fresh faccessat every time
+                        try:
+                            if not (entry.stat().st_mode & 0o111):
+                                continue
+                        except OSError:
+                            continue
+
+                        name_lower = name.lower()
+
+                        matches_pattern = (
+                            name_lower in exact_matches or
+                            (prefix_re is not None and prefix_re.match(name_lower) is not None) or
+                            (suffix_re is not None and suffix_re.search(name_lower) is not None and
+                             not (exclusion_re is not None and exclusion_re.search(name_lower)))
+                        )
+
+                        if matches_pattern:
+                            candidates[name] = entry.path
+                            seen.add(name)
+                            # Tag Node.js-based tools in the same pass -
+                            # name_lower is already in hand, so the old
+                            # separate _track_node_tools walk (with its
+                            # re-lowercasing) is folded in here
+                            if any(ind in name_lower for ind in _NODE_TOOL_INDICATORS):
+                                node_tools.append(name)
+
             except (PermissionError, OSError):
                 continue
-        
-        custom_tools = config_manager.get_custom_cli_tools()
+
         for tool in custom_tools:
             if tool not in excluded and tool not in seen:
                 tool_path = shutil.which(tool)
                 if tool_path:
                     candidates[tool] = tool_path
                     seen.add(tool)
-        
+                    tool_lower = tool.lower()
+                    if any(ind in tool_lower for ind in _NODE_TOOL_INDICATORS):
+                        node_tools.append(tool)
+
         # Store tool paths for later use
         self.tool_paths = candidates
-        
+
+        if node_tools:
+            # Sorted so repeated saves of the same set are byte-identical
+            config_manager.set_known_node_tools(sorted(node_tools))
+
         # Return sorted list of tool names
-        available_tools = sorted(candidates.keys())
-        self._track_node_tools(available_tools, config_manager)
-        
-        return available_tools
+        return sorted(candidates.keys())
     
     def _get_node_version_dirs(self) -> list:
         """Get bin directories from all Node.js version managers"""
@@ -223,57 +510,83 @@ class AIModelManager:
         
         return dirs
     
-    def _track_node_tools(self, tools: list, config_manager) -> None:
-        """Track Node.js-based tools that may change across version switches"""
-        node_indicators = ['node_modules', 'npm', 'yarn', 'pnpm']
-        npm_ai_tools = ['claude', 'gemini', 'chatgpt', 'gpt', 'ai', 'llm']
-        
-        node_tools = [
-            tool for tool in tools
-            if any(indicator in tool.lower() for indicator in node_indicators + npm_ai_tools)
-        ]
-        
-        if node_tools:
-            config_manager.set_known_node_tools(node_tools)
-    
-    def get_available_models(self) -> list:
+    def get_available_models(self) -> List[str]:
         """Get list of available models based on configured API keys and local models"""
+        if self._available_models is not None:
+            return self._available_models
+
         available = []
-        
+
+        # Key presence, not the client property, decides availability -
+        # listing models must not force the SDK imports
         if self.qwen_enabled:
             available.append("qwen")
-        if self.claude_client:
+        if self._claude_api_key:
             available.append("claude")
-        if self.gemini_model:
+        if self._gemini_api_key:
             available.append("gemini")
         if self.ollama_available and self.ollama_models:
             available.extend([f"ollama:{model}" for model in self.ollama_models])
-            
+
+        self._available_models = available
         return available
     
+    def refresh(self):
+        """Re-run discovery and key resolution for this manager
+
+        For keys set mid-process, models pulled, or tools installed:
+        clears the shared discovery caches and rebuilds the manager
+        state, including the memoized available-models list and the lazy
+        client sentinels.
+        """
+        global _OLLAMA_PROBE
+        _OLLAMA_PROBE = None
+        _DISCOVERY_CACHE.clear()
+        _load_scan_patterns.cache_clear()
+        self._setup_apis()
+
     def chat(self, model_name: str, prompt: str) -> str:
         """Unified chat interface for all models"""
+        cache = self.response_cache
+        if cache is not None:
+            cached = cache.get(model_name, prompt)
+            if cached is not None:
+                return cached
+
+        response = self._dispatch_chat(model_name, prompt)
+
+        # Don't cache failures - a key being configured, Ollama coming
+        # up, or a timeout passing should take effect immediately, not
+        # after the TTL
+        if cache is not None and not self._is_error(response):
+            cache.set(model_name, prompt, response)
+        return response
+
+    @classmethod
+    def _is_error(cls, response: str) -> bool:
+        """Whether a wrapper reply is a failure rather than model output"""
+        return (response.startswith(cls._ERROR_PREFIXES)
+                or "not configured" in response
+                or "not available" in response)
+
+    def _dispatch_chat(self, model_name: str, prompt: str) -> str:
+        """Route a prompt to the provider behind model_name"""
         if model_name.startswith("ollama:"):
             return self.ollama_model(prompt, model_name[7:])
-        elif model_name == "qwen":
-            return self.qwen(prompt)
-        elif model_name == "claude":
-            return self.claude(prompt)
-        elif model_name == "gemini":
-            return self.gemini(prompt)
-        else:
-            return f"Unknown model: {model_name}"
+        handler = self._dispatch.get(model_name)
+        if handler is not None:
+            return handler(prompt)
+        return f"Unknown model: {model_name}"
     
     def qwen(self, prompt: str) -> str:
         """Get response from Qwen model"""
         if not self.qwen_enabled:
             if not DASHSCOPE_AVAILABLE:
-                return "Qwen integration requires the dashscope package. Install it with: pip install dashscope"
+                return self._QWEN_NO_PKG
             else:
-                return "Qwen API key not configured. Please set QWEN_API_KEY environment variable."
+                return self._QWEN_NO_KEY
         
         try:
-            import dashscope
             response = dashscope.ChatCompletion.call(
                 model='qwen-max',
                 messages=[
@@ -290,28 +603,33 @@ class AIModelManager:
     
     def claude(self, prompt: str) -> str:
         """Get response from Claude model"""
-        if not self.claude_client:
-            return "Claude API key not configured. Please set CLAUDE_API_KEY environment variable."
-        
         try:
-            message = self.claude_client.messages.create(
+            # Reading the property inside the try keeps a construction-
+            # time failure in the lazy client on the error-string path
+            client = self.claude_client
+            if not client:
+                return self._CLAUDE_NO_KEY
+            # Stream and join - same final string as .create, but chunks
+            # arrive as they are generated instead of being buffered
+            # server-side until the response completes
+            with client.messages.stream(
                 model="claude-3-haiku-20240307",
                 max_tokens=500,
                 messages=[
                     {"role": "user", "content": prompt}
                 ]
-            )
-            return message.content[0].text
+            ) as stream:
+                return "".join(stream.text_stream)
         except Exception as e:
             return f"Error calling Claude: {str(e)}"
     
     def gemini(self, prompt: str) -> str:
         """Get response from Gemini model"""
-        if not self.gemini_model:
-            return "Gemini API key not configured. Please set GEMINI_API_KEY environment variable."
-        
         try:
-            response = self.gemini_model.generate_content(prompt)
+            model = self.gemini_model
+            if not model:
+                return self._GEMINI_NO_KEY
+            response = model.generate_content(prompt)
             return response.text
         except Exception as e:
             return f"Error calling Gemini: {str(e)}"
@@ -319,16 +637,32 @@ class AIModelManager:
     def ollama_model(self, prompt: str, model: str = "llama2") -> str:
         """Get response from a local Ollama model"""
         if not self.ollama_available:
-            return "Ollama is not available. Please install and start Ollama server."
-        
-        if model not in self.ollama_models:
-            return f"Model '{model}' not available. Available models: {', '.join(self.ollama_models) if self.ollama_models else 'None'}"
+            return self._OLLAMA_DOWN
         
+        if model not in self._ollama_models_set:
+            return f"Model '{model}' not available. Available models: {self._ollama_models_listing}"
+
+        # Talk to the server directly - `ollama run` forks a second
+        # client that connects to the same server, buffers the whole
+        # response, and prints it, all overhead the REST call skips
+        try:
+            response = self._http_client.post(
+                _OLLAMA_GENERATE_URL,
+                json={"model": model, "prompt": prompt, "stream": False},
+                timeout=60,
+            )
+            if response.status_code == 200:
+                return response.json().get("response", "").strip()
+        except httpx.TimeoutException:
+            return f"Timeout calling Ollama model {model}: Request took too long"
+        except (httpx.HTTPError, ValueError):
+            pass  # Server not on the default port - fall back to the CLI
+
         try:
             result = subprocess.run([
                 'ollama', 'run', model
             ], input=prompt, text=True, capture_output=True, timeout=60)
-            
+
             if result.returncode == 0:
                 return result.stdout.strip()
             else:
@@ -338,9 +672,235 @@ class AIModelManager:
         except Exception as e:
             return f"Error calling Ollama model {model}: {str(e)}"
     
-    def get_available_resources(self) -> dict:
+    def chat_stream(self, model_name: str, prompt: str):
+        """Streaming variant of chat() - yields response chunks as they arrive
+
+        Providers without a streaming API fall back to yielding the full
+        response in one chunk, so callers can always iterate.
+        """
+        if model_name.startswith("ollama:"):
+            yield from self.ollama_stream(prompt, model_name[7:])
+            return
+        handler = self._stream_dispatch.get(model_name)
+        if handler is not None:
+            yield from handler(prompt)
+        else:
+            yield self.chat(model_name, prompt)
+
+    def claude_stream(self, prompt: str):
+        """Stream a response from Claude chunk by chunk"""
+        try:
+            client = self.claude_client
+            if not client:
+                yield self._CLAUDE_NO_KEY
+                return
+            with client.messages.stream(
+                model="claude-3-haiku-20240307",
+                max_tokens=500,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            ) as stream:
+                yield from stream.text_stream
+        except Exception as e:
+            yield f"Error calling Claude: {str(e)}"
+
+    def gemini_stream(self, prompt: str):
+        """Stream a response from Gemini chunk by chunk"""
+        try:
+            model = self.gemini_model
+            if not model:
+                yield self._GEMINI_NO_KEY
+                return
+            for chunk in model.generate_content(prompt, stream=True):
+                if chunk.text:
+                    yield chunk.text
+        except Exception as e:
+            yield f"Error calling Gemini: {str(e)}"
+
+    def ollama_stream(self, prompt: str, model: str = "llama2"):
+        """Stream a response from a local Ollama model chunk by chunk"""
+        if not self.ollama_available:
+            yield self._OLLAMA_DOWN
+            return
+
+        if model not in self._ollama_models_set:
+            yield f"Model '{model}' not available. Available models: {self._ollama_models_listing}"
+            return
+
+        # Stream straight from the server - each line of the chunked
+        # response is a JSON object carrying the next token batch, with
+        # no second ollama client process in between
+        try:
+            with self._http_client.stream(
+                'POST', _OLLAMA_GENERATE_URL,
+                json={"model": model, "prompt": prompt, "stream": True},
+                timeout=60,
+            ) as response:
+                if response.status_code == 200:
+                    try:
+                        for line in response.iter_lines():
+                            if not line:
+                                continue
+                            chunk = json.loads(line)
+                            piece = chunk.get("response")
+                            if piece:
+                                yield piece
+                            if chunk.get("done"):
+                                break
+                    except (httpx.HTTPError, ValueError) as e:
+                        yield f"Error calling Ollama model {model}: {str(e)}"
+                    return
+        except httpx.HTTPError:
+            pass  # Server not on the default port - fall back to the CLI
+
+        try:
+            # stderr goes to DEVNULL, not PIPE: the fallback never reads
+            # it, and an undrained pipe fills up and deadlocks the child
+            # once ollama has written a buffer's worth of progress output
+            process = subprocess.Popen(
+                ['ollama', 'run', model],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL, text=True
+            )
+            process.stdin.write(prompt)
+            process.stdin.close()
+            for chunk in iter(lambda: process.stdout.read(256), ''):
+                yield chunk
+            process.wait(timeout=60)
+        except Exception as e:
+            yield f"Error calling Ollama model {model}: {str(e)}"
+
+    async def achat(self, model_name: str, prompt: str) -> str:
+        """Async counterpart of chat() for event-loop callers
+
+        The provider wrappers stay synchronous - one code path, no
+        per-SDK async client to maintain - and run on the default
+        executor so they never block the caller's loop. The calls
+        release the GIL while waiting on the network, so gathering
+        several of these still overlaps them fully.
+        """
+        return await asyncio.to_thread(self.chat, model_name, prompt)
+
+    def compare_models(self, prompt: str) -> Dict[str, str]:
+        """Send the same prompt to every available model concurrently
+
+        Thread fan-out rather than asyncio.gather: every provider call
+        here is a sync SDK or HTTP call that releases the GIL while
+        waiting, so threads already collapse total latency to the
+        slowest provider without forcing an async variant of each
+        wrapper into the API.
+        """
+        models = self.get_available_models()
+        if not models:
+            return {}
+
+        # Each call is network-bound, so fan out on threads and wait for all
+        # of them - total wall time is the slowest provider, not the sum
+        results = {}
+        # Capped so a machine with dozens of pulled ollama models doesn't
+        # spawn a thread per model
+        with ThreadPoolExecutor(max_workers=min(len(models), 8)) as pool:
+            futures = {model: pool.submit(self.chat, model, prompt) for model in models}
+            for model, future in futures.items():
+                try:
+                    results[model] = future.result()
+                except Exception as e:
+                    results[model] = f"Error getting response from {model}: {str(e)}"
+        return results
+
+    async def acompare_models(self, prompt: str) -> Dict[str, str]:
+        """Async compare with a single uniform error path
+
+        gather(..., return_exceptions=True) replaces per-call try/except
+        blocks: every provider runs to completion, failures come back as
+        exception objects, and one comprehension formats them the same
+        way the sync path does.
+        """
+        models = self.get_available_models()
+        if not models:
+            return {}
+
+        results = await asyncio.gather(
+            *(self.achat(model, prompt) for model in models),
+            return_exceptions=True,
+        )
+        return {
+            model: (f"Error getting response from {model}: {result}"
+                    if isinstance(result, BaseException) else result)
+            for model, result in zip(models, results)
+        }
+
+    def preload_models(self, models: List[str]) -> None:
+        """Ask the Ollama server to keep the given models loaded
+
+        A cold model's first inference pays the full weights load; an
+        empty-prompt generate with keep_alive pins it in server memory
+        so the real call starts producing tokens immediately. Names may
+        carry the ollama: prefix; unknown and already-warmed models are
+        skipped, and a server that doesn't answer is ignored.
+        """
+        if not self.ollama_available:
+            return
+
+        for model in models:
+            name = model.removeprefix("ollama:")
+            if name not in self._ollama_models_set or name in self._warmed_models:
+                continue
+            try:
+                self._http_client.post(
+                    _OLLAMA_GENERATE_URL,
+                    json={"model": name, "prompt": "", "keep_alive": "30m"},
+                    timeout=5,
+                )
+                self._warmed_models.add(name)
+            except httpx.HTTPError:
+                return
+
+    def compare_models_multi(self, prompts: List[str]) -> Dict[str, List[str]]:
+        """Send several prompts to every available model concurrently
+
+        One pool fans out over the full model x prompt grid, so wall
+        time stays near the slowest single call instead of growing with
+        either axis. Responses come back per model, in prompt order.
+        """
+        models = self.get_available_models()
+        if not models or not prompts:
+            return {}
+
+        results = {model: [""] * len(prompts) for model in models}
+        with ThreadPoolExecutor(max_workers=min(len(models) * len(prompts), 8)) as pool:
+            futures = {
+                pool.submit(self.chat, model, prompt): (model, index)
+                for model in models
+                for index, prompt in enumerate(prompts)
+            }
+            for future, (model, index) in futures.items():
+                try:
+                    results[model][index] = future.result()
+                except Exception as e:
+                    results[model][index] = f"Error getting response from {model}: {str(e)}"
+        return results
+
+    def get_available_resources(self) -> Dict[str, List[str]]:
         """Get both AI models and CLI tools available on the system"""
         return {
             "models": self.get_available_models(),
             "cli_tools": self.available_cli_tools
-        }
\ No newline at end of file
+        }
+
+
+# Managers keyed by the provider keys they were built against, so repeat
+# callers share one instance (and its warm HTTP pool and discovery
+# results) while a reconfigured key still gets a fresh build
+_MANAGER_CACHE: Dict[tuple, AIModelManager] = {}
+
+
+def get_model_manager() -> AIModelManager:
+    """Return the shared AIModelManager for the current configuration"""
+    config_manager = _get_config_manager()
+    key = tuple(config_manager.get_api_key(provider) for provider in PROVIDERS)
+    manager = _MANAGER_CACHE.get(key)
+    if manager is None:
+        manager = _MANAGER_CACHE[key] = AIModelManager()
+    return manager
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""Shared fixtures for the test suite"""
+import sys
+
+import pytest
+
+# Seed a negative entry before ai_cli.models runs its guarded
+# `import dashscope`: the import fails at the sys.modules check (no
+# path search) and the suite takes the no-SDK branch on every machine,
+# with or without dashscope installed
+sys.modules.setdefault("dashscope", None)
+
+# Imported at collection time so the first test is not charged for the
+# transitive module init (httpx, dashscope) and per-test timings
+# reflect the tests themselves
+from ai_cli import models as _models
+from ai_cli.models import AIModelManager
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _no_response_cache():
+    """Keep test runs out of the user's real ~/.ai-cli response cache
+
+    Managers built with AI_CLI_NO_CACHE set skip the ResponseCache, so
+    nothing a test provokes is written under the developer's home.
+    """
+    mp = pytest.MonkeyPatch()
+    mp.setenv("AI_CLI_NO_CACHE", "1")
+    yield
+    mp.undo()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _offline_ollama():
+    """Make the Ollama probe deterministic for the whole session
+
+    The real probe hits the local REST API and falls back to an
+    `ollama list` subprocess; on a dev box with a daemon running the
+    tests would exercise whichever branch that box happens to be in.
+    Patching the probe to report "no daemon" keeps every construction
+    pure Python and the same on every machine. Tests that need the
+    positive branch use the `ollama_manager` fixture instead.
+    """
+    mp = pytest.MonkeyPatch()
+    mp.setattr(_models, "_OLLAMA_PROBE", None)
+    mp.setattr(AIModelManager, "_probe_ollama", lambda self: (False, []))
+    yield
+    mp.undo()
+
+
+@pytest.fixture(scope="session")
+def manager():
+    """One AIModelManager shared by every read-only test
+
+    Construction scans PATH and (lazily) probes Ollama; the tests that
+    only inspect the result reuse a single instance instead of paying
+    that once per test.
+    """
+    return AIModelManager()
+
+
+@pytest.fixture
+def unconfigured_manager(monkeypatch):
+    """A manager with no provider keys, whatever the host env has set
+
+    On a dev box with real keys exported, compare_models would fan out
+    to live APIs and sit in network timeouts; stripping the keys forces
+    the empty fan-out deterministically.
+    """
+    for key in ("QWEN_API_KEY", "CLAUDE_API_KEY", "GEMINI_API_KEY"):
+        monkeypatch.delenv(key, raising=False)
+    monkeypatch.setattr("ai_cli.models.ConfigManager.get_api_key", lambda self, p: None)
+    return AIModelManager()
+
+
+@pytest.fixture
+def ollama_manager(monkeypatch):
+    """A manager whose probe reports a fake daemon with two models
+
+    Covers the Ollama-available branch without a real server or any
+    pulled models.
+    """
+    monkeypatch.setattr(_models, "_OLLAMA_PROBE", None)
+    monkeypatch.setattr(
+        AIModelManager, "_probe_ollama", lambda self: (True, ["llama2", "mistral"])
+    )
+    return AIModelManager()
@@ -37,4 +37,4 @@ def test_invalid_command():
     assert result.exit_code != 0
 
 if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
+    pytest.main([__file__, "-p", "no:cacheprovider", "-p", "no:stepwise", "--no-header"])
\ No newline at end of file
@@ -36,4 +36,4 @@ def test_config_workflow():
 
 
 if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
+    pytest.main([__file__, "-p", "no:cacheprovider", "-p", "no:stepwise", "--no-header"])
\ No newline at end of file
@@ -1,81 +1,149 @@
 """Test the models module directly"""
-import os
 import pytest
-from unittest.mock import patch
-from ai_cli.models import AIModelManager
+from unittest.mock import MagicMock
+
+# Skip the file in one line on envs where the package cannot import,
+# instead of failing collection with a full traceback
+ai_cli_models = pytest.importorskip("ai_cli.models")
+AIModelManager = ai_cli_models.AIModelManager
 
 
 @pytest.mark.unit
-def test_model_manager_initialization():
+def test_model_manager_initialization(manager):
     """Test that the AIModelManager initializes correctly"""
-    manager = AIModelManager()
-    # Check that manager has expected attributes
-    assert hasattr(manager, 'claude_client')
-    assert hasattr(manager, 'gemini_model')
-    assert hasattr(manager, 'qwen_enabled')
-    assert hasattr(manager, 'ollama_available')
-    assert hasattr(manager, 'ollama_models')
-    assert hasattr(manager, 'available_cli_tools')
+    # One subset check instead of six hasattr calls; on failure the
+    # diff lists every missing name at once. dir() rather than vars()
+    # because the client/ollama names are lazy properties on the class
+    expected = {
+        'claude_client', 'gemini_model', 'qwen_enabled',
+        'ollama_available', 'ollama_models', 'available_cli_tools',
+    }
+    assert expected <= set(dir(manager))
 
 
 @pytest.mark.unit
-def test_qwen_method_without_dashscope():
-    """Test Qwen method when dashscope is not available"""
+def test_qwen_method_without_dashscope(monkeypatch):
+    """Test Qwen method when no Qwen key is configured"""
+    # monkeypatch restores the env and config lookup even if an
+    # assertion fails, so no manual save/restore is needed
+    monkeypatch.delenv("QWEN_API_KEY", raising=False)
+    monkeypatch.setattr("ai_cli.models.ConfigManager.get_api_key", lambda self, p: None)
     manager = AIModelManager()
-    # This should gracefully handle the absence of API key
-    assert isinstance(manager.qwen_enabled, bool)
+    assert manager.qwen_enabled is False
+    assert "not configured" in manager.qwen("hi") or "dashscope" in manager.qwen("hi")
+
+
+@pytest.mark.unit
+def test_manager_smoke(manager, unconfigured_manager):
+    """One pass over the query surface; types are the annotations' job"""
+    assert callable(manager.chat)
+    assert manager.get_available_models() is not None
+    # compare on the key-stripped manager: with host keys present the
+    # session manager would fan out to live billable APIs
+    assert unconfigured_manager.compare_models("Test prompt") == {}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "response, is_error",
+    [
+        ("Error calling Claude: boom", True),
+        ("Timeout calling Ollama model llama2: Request took too long", True),
+        ("Unknown model: gpt", True),
+        ("No response from Qwen", True),
+        ("Claude API key not configured. Please set CLAUDE_API_KEY environment variable.", True),
+        ("Model 'llama2' not available. Available models: None", True),
+        ("The capital of France is Paris.", False),
+    ],
+)
+def test_is_error_classifies_failure_strings(response, is_error):
+    """Every failure string a wrapper can return must be uncacheable"""
+    assert AIModelManager._is_error(response) is is_error
 
 
 @pytest.mark.unit
-def test_available_models_without_keys():
-    """Test that available models list is returned"""
+def test_claude_client_builds_against_installed_sdk(monkeypatch):
+    """Test that the lazy Claude client constructs with a key present
+
+    Regression: handing the shared httpx.Client to the SDK as
+    http_client= raised TypeError at construction with anthropic
+    releases that vendor their own httpx fork.
+    """
+    monkeypatch.setenv("CLAUDE_API_KEY", "sk-test-not-a-real-key")
+    monkeypatch.setattr("ai_cli.models.ConfigManager.get_api_key", lambda self, p: None)
     manager = AIModelManager()
-    models = manager.get_available_models()
-    # Should be a list of available models
-    assert isinstance(models, list)
+    assert manager.claude_client is not None
 
 
 @pytest.mark.unit
-def test_get_available_resources():
+def test_get_available_models_is_memoized(manager):
+    """Repeat calls return the cached list, not a recomputation"""
+    assert manager.get_available_models() is manager.get_available_models()
+
+
+@pytest.mark.unit
+def test_get_available_resources(manager):
     """Test get_available_resources returns proper structure"""
-    manager = AIModelManager()
     resources = manager.get_available_resources()
-    assert isinstance(resources, dict)
     assert "models" in resources
     assert "cli_tools" in resources
-    assert isinstance(resources["models"], list)
-    assert isinstance(resources["cli_tools"], list)
 
 
 @pytest.mark.unit
-def test_ollama_method_without_ollama():
+@pytest.mark.timeout(5)
+def test_ollama_method_without_ollama(manager):
     """Test Ollama method when Ollama is not available"""
-    manager = AIModelManager()
-    # Check that ollama_available is a boolean
-    assert isinstance(manager.ollama_available, bool)
-    assert isinstance(manager.ollama_models, list)
+    # The autouse probe mock reports no daemon, so this is deterministic
+    assert manager.ollama_available is False
+    assert manager.ollama_models == []
 
 
 @pytest.mark.unit
-def test_get_available_models_includes_ollama():
+def test_get_available_models_includes_ollama(ollama_manager):
     """Test that get_available_models includes Ollama models when available"""
-    manager = AIModelManager()
-    models = manager.get_available_models()
-    
-    assert isinstance(models, list)
-    # If Ollama is available, it should include ollama models with 'ollama:' prefix
+    models = ollama_manager.get_available_models()
+
+    # The fake daemon serves two models; both appear with the prefix
     ollama_models = [m for m in models if m.startswith('ollama:')]
-    if manager.ollama_available and manager.ollama_models:
-        assert len(ollama_models) > 0
+    assert ollama_models == ['ollama:llama2', 'ollama:mistral']
 
 
 @pytest.mark.unit
-def test_chat_method_exists():
-    """Test that chat method exists"""
-    manager = AIModelManager()
-    assert hasattr(manager, 'chat')
-    assert callable(manager.chat)
+def test_ollama_model_mocked_transport(ollama_manager, monkeypatch):
+    """Test ollama_model against a stubbed HTTP transport"""
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"response": " ok "}
+    client = MagicMock()
+    client.post.return_value = response
+    monkeypatch.setattr(ollama_manager, "_http_client", client)
+
+    assert ollama_manager.ollama_model("Test prompt", "llama2") == "ok"
+    client.post.assert_called_once()
+
+
+@pytest.mark.unit
+def test_ollama_model_rejects_unknown_model(ollama_manager):
+    """Test the guard for a model the fake daemon does not serve"""
+    response = ollama_manager.ollama_model("Test prompt", "not-pulled")
+    assert "not available" in response
+    assert "llama2" in response
+
+
+@pytest.mark.unit
+def test_ollama_model_when_daemon_down(manager):
+    """Test that ollama_model short-circuits when no daemon answers"""
+    assert "not available" in manager.ollama_model("Test prompt", "llama2")
+
+
+@pytest.mark.unit
+@pytest.mark.timeout(5)
+def test_compare_models_skips_unavailable_providers(unconfigured_manager):
+    """Test that compare_models only fans out to available models"""
+    responses = unconfigured_manager.compare_models("Test prompt")
+    # With no keys and no daemon there is nothing to query, so the
+    # fan-out must be empty - no provider gets a speculative call
+    assert responses == {}
 
 
 if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
+    pytest.main([__file__, "-p", "no:cacheprovider", "-p", "no:stepwise", "--no-header"])